@@ -0,0 +1,43 @@
+# Copyright 2018 IBM Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# cython: language_level=2
+
+""" Optional compiled implementation of JSON query matching.
+
+See `flowgraph.core.annotation_db`, which falls back to a pure Python
+implementation when this extension module is not built.
+"""
+from cpython.dict cimport PyDict_Check, PyDict_GetItem
+from cpython.object cimport PyObject
+
+
+def match_paths(list match, object obj):
+    """ Match a compiled JSON query against a JSON object.
+    """
+    cdef tuple path
+    cdef object value, key, current
+    cdef PyObject* item
+    for path, value in match:
+        current = obj
+        for key in path:
+            if not PyDict_Check(current):
+                return False
+            item = PyDict_GetItem(current, key)
+            if item is NULL:
+                return False
+            current = <object>item
+        if value != current:
+            return False
+    return True
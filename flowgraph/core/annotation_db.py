@@ -14,34 +14,71 @@
 
 from __future__ import absolute_import
 
+from collections import OrderedDict, defaultdict, namedtuple
+from contextlib import closing
+from functools import reduce
 import json
-from pathlib2 import Path
+import mmap
+from operator import attrgetter
+import six
+from six.moves import intern
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-import blitzdb
-from blitzdb import fields
-import sqlalchemy
-from traitlets import HasTraits, Instance, default
+from cachetools import LRUCache, cachedmethod
 
 
-class AnnotationDB(HasTraits):
+class AnnotationDB(object):
     """ An in-memory JSON database of object and function annotations.
     
     The class contains no Python-specific annotation logic. For that,
     see `flowgraph.kernel.trace.annotator`.
     """
     
-    # Underlying in-memory database backend.
-    _database = Instance(blitzdb.backends.base.Backend)
+    def __init__(self, **kwargs):
+        super(AnnotationDB, self).__init__(**kwargs)
+        
+        # Map: primary key -> annotation document, in load order.
+        self._documents = OrderedDict()
+        
+        # Map: primary key -> position in load order.
+        self._order = {}
+        
+        # Inverted index, for each indexed field.
+        # Map: field name -> (field value -> set of primary keys).
+        self._index = { field: defaultdict(set) for field in _INDEXED_FIELDS }
+        
+        # Cache of results for `get`, keyed by query. Annotations are looked
+        # up repeatedly for the same functions and types while tracing.
+        self._get_cache = LRUCache(maxsize=4096)
     
     def load_documents(self, notes):
         """ Load annotations from an iterable of JSON documents
         (JSON-able dictionaries).
         """
+        documents, index = self._documents, self._index
         for note in notes:
             if note['schema'] == 'annotation' and note['language'] == 'python':
-                doc = Annotation(note)
-                doc.pk = note['_id']
-                self._database.save(doc)
+                pk = note['_id']
+                if pk in documents:
+                    # Replace the document, keeping its position.
+                    self._unindex_document(pk)
+                else:
+                    self._order[pk] = len(self._order)
+                doc = dict(note)
+                doc['pk'] = pk
+                for field in _INTERNED_FIELDS:
+                    value = doc.get(field)
+                    if type(value) is str:
+                        doc[field] = intern(value)
+                documents[pk] = doc
+                # Missing values are indexed as None, so that nullable fields,
+                # such as `method`, can be queried for null values.
+                for field in _INDEXED_FIELDS:
+                    index[field][doc.get(field)].add(pk)
+        self._get_cache.clear()
     
     def load_file(self, filename):
         """ Load annotations from a JSON file.
@@ -49,81 +86,197 @@ class AnnotationDB(HasTraits):
         Typically annotations will be loaded from a remote database but this
         method is useful for local testing.
         """
-        with Path(filename).open('r') as f:
-            self.load_documents(json.load(f))
+        with open(filename, 'rb') as f:
+            if orjson is None:
+                notes = json.load(f)
+            else:
+                # Parse directly from the memory-mapped file.
+                with closing(mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ)) as mm:
+                    with memoryview(mm) as buf:
+                        notes = orjson.loads(buf)
+        self.load_documents(notes)
 
+    @cachedmethod(cache=attrgetter('_get_cache'),
+                  key=lambda self, query: _freeze_query(query))
     def get(self, query):
         """ Get a single document matching the query.
         
         Returns the document or None if no document matches the query.
         Raises a LookupError if there are multiple matches.
         """
-        notes = list(self.filter(query))
-        if len(notes) > 1:
+        # Pull at most two documents from the filter.
+        notes = iter(self.filter(query))
+        note = next(notes, None)
+        if note is not None and next(notes, None) is not None:
             raise LookupError("Multiple matches for query %r" % query)
-        return notes[0] if notes else None
+        return note
     
     def filter(self, query):
         """ Get all documents matching the query.
         
-        Returns an iterable.
+        Returns an iterable, yielding documents in the order in which they
+        were first loaded.
         """
-        blitz_query = { key: query.pop(key) for key in list(query.keys())
-                        if key in Annotation.fields.keys() or 
-                           key.startswith('$') }
-        blitz_result = self._database.filter(Annotation, blitz_query)
-        return (doc.attributes for doc in blitz_result
-                if self._query_json(query, doc.attributes))
+        query = dict(query)
+        index_query = { key: query.pop(key) for key in list(query.keys())
+                        if key in _INDEX_QUERY_FIELDS or key[:1] == '$' }
+        match = _compile_query(query)
+        documents = self._documents
+        if index_query:
+            pks = sorted(self._query_index(index_query),
+                         key=self._order.__getitem__)
+            docs = (documents[pk] for pk in pks)
+        else:
+            docs = six.itervalues(documents)
+        return (doc for doc in docs if _match_paths(match, doc))
     
     # Private interface
     
-    def _query_json(self, query, obj):
-        """ Recursively match a JSON query against a JSON object.
+    def _query_index(self, query):
+        """ Get the primary keys of all documents matching a query on the
+        indexed fields.
+        
+        Supports the MongoDB operators `$or` and `$in`.
+        """
+        matches = []
+        for key, value in query.items():
+            if key == '$or':
+                matches.append(set(doc['pk'] for subquery in value
+                                   for doc in self.filter(subquery)))
+                continue
+            elif key.startswith('$'):
+                raise NotImplementedError(
+                    "MongoDB operator %s not implemented" % key)
+            
+            if isinstance(value, dict):
+                if list(value.keys()) != ['$in']:
+                    raise NotImplementedError(
+                        "MongoDB operators not implemented: %r" % value)
+                values = value['$in']
+            else:
+                values = [ value ]
+            
+            if key == 'pk':
+                pks = set(pk for pk in values if pk in self._documents)
+            elif len(values) == 1:
+                pks = self._index[key].get(values[0], frozenset())
+            else:
+                index = self._index[key]
+                pks = set()
+                for v in values:
+                    pks.update(index.get(v, ()))
+            matches.append(pks)
+        
+        # Intersect starting from the smallest set.
+        matches.sort(key=len)
+        return reduce(lambda pks, other: pks & other, matches)
+    
+    def _unindex_document(self, pk):
+        """ Remove a document from the index (but not the database).
         """
-        # XXX: This is a quick hack to work around the BlitzDB SQL backend's 
-        # requirement that query fields be indexed and unstructured.
-        # When BlitzDB is improved or replaced, this function should be deleted.
+        doc = self._documents[pk]
+        for field in _INDEXED_FIELDS:
+            value = doc.get(field)
+            index = self._index[field]
+            pks = index[value]
+            pks.discard(pk)
+            if not pks:
+                del index[value]
+
+
+def _compile_query(query):
+    """ Compile a JSON query into a list of (path, value) pairs.
+    
+    A JSON object matches the query iff, for every pair, the object has the
+    given value at the given path of keys (see `_match_paths`).
+    """
+    match = []
+    def compile_at(path, query):
         if isinstance(query, dict):
-            if not isinstance(obj, dict):
-                return False
-            for key in query.keys():
+            if path and not query:
+                match.append((path, _ANY_DICT))
+            for key, value in query.items():
                 if key.startswith('$'):
                     raise NotImplementedError("MongoDB operators not implemented")
-                if not (key in obj and self._query_json(query[key], obj[key])):
-                    return False
-            return True
+                compile_at(path + (key,), value)
         else:
-            return query == obj
-    
-    # Trait initializers
+            match.append((path, query))
+    compile_at((), query)
+    return match
+
+
+def _match_paths_py(match, obj):
+    """ Match a compiled JSON query (see `_compile_query`) against a JSON object.
     
-    @default('_database')
-    def _database_default(self):
-        """ Create SQL backend with in-memory SQLite database.
-        """
-        engine = sqlalchemy.create_engine('sqlite://') 
-        backend = blitzdb.backends.sql.Backend(engine) 
-        backend.register(Annotation)
-        backend.init_schema()
-        backend.create_schema()
-        return backend
+    This is the pure Python implementation of `_match_paths`, used when the
+    compiled version in the `_query` extension module is not available.
+    """
+    for path, value in match:
+        current = obj
+        for key in path:
+            if not isinstance(current, dict):
+                return False
+            current = current.get(key, _MISSING)
+            if current is _MISSING:
+                return False
+        if value != current:
+            return False
+    return True
 
 
-class Annotation(blitzdb.Document):
-    """ Partial schema for annotation.
+class _AnyDict(object):
+    """ Placeholder value in compiled query that matches any JSON object.
+    """
+    def __eq__(self, other):
+        return isinstance(other, dict)
     
-    Treat this class as an implementation detail of AnnotationDB.
+    def __ne__(self, other):
+        return not isinstance(other, dict)
+
+_ANY_DICT = _AnyDict()
+_MISSING = object()
+
+try:
+    from ._query import match_paths as _match_paths
+except ImportError:
+    _match_paths = _match_paths_py
+
+
+def _freeze_query(query):
+    """ Convert a JSON query into a hashable object, for use as a cache key.
     """
-    # XXX: The BlitzDB SQL backend does not support changing the primary key.
-    #class Meta(blitzdb.Document.Meta):
-    #    primary_key = '_id'
-    #
-    #_id = fields.CharField(nullable=False, indexed=True)
+    if isinstance(query, dict):
+        return frozenset((key, _freeze_query(value))
+                         for key, value in query.items())
+    elif isinstance(query, list):
+        return tuple(_freeze_query(value) for value in query)
+    return query
+
+
+class Annotation(namedtuple('Annotation', [
+        'language', 'package', 'id', 'kind', 'function', 'method', 'pk'])):
+    """ Partial schema for annotation.
     
-    language = fields.CharField(nullable=False, indexed=True)
-    package = fields.CharField(nullable=False, indexed=True)
-    id = fields.CharField(nullable=False, indexed=True)
-    kind = fields.EnumField(['type', 'function'], nullable=False, indexed=True)
+    Treat this class as an implementation detail of AnnotationDB. Documents
+    are stored as plain JSON dictionaries; this class only declares the
+    fields that are indexed:
     
-    function = fields.CharField(nullable=True, indexed=True)
-    method = fields.CharField(nullable=True, indexed=True)
+    - language, package, id : str
+    - kind : 'type' or 'function'
+    - function, method : str or None
+    - pk : str (primary key, same as `_id`)
+    """
+    __slots__ = ()
+
+
+# Fields of `Annotation` that are indexed by `AnnotationDB`, besides the
+# primary key, which is the key of the document store itself.
+_INDEXED_FIELDS = tuple(field for field in Annotation._fields if field != 'pk')
+
+# Fields whose string values are interned when loaded, since the same few
+# values are repeated across many documents.
+_INTERNED_FIELDS = _INDEXED_FIELDS + ('schema',)
+
+# Fields that can be queried through the index (including the primary key).
+_INDEX_QUERY_FIELDS = frozenset(Annotation._fields)
@@ -67,21 +67,17 @@ def record_code(code, codename=None, out=None, env=None, cwd=None, db=None,
     builder.annotator.db = db
 
     # Set up tracer.
-    def handle_trace_event(changed):
-        event = changed['new']
-        if event:
-            builder.push_event(event)
     tracer = Tracer()
 
     # Evaluate the code in the right working directory and environment.
     if cwd is not None:
         oldcwd = os.getcwd()
         os.chdir(cwd)
-    tracer.observe(handle_trace_event, 'event')
+    tracer.add_event_handler(builder.push_event)
     try:
         tracer.trace(code, codename=codename, env=env)
     finally:
-        tracer.unobserve(handle_trace_event, 'event')
+        tracer.remove_event_handler(builder.push_event)
         if cwd is not None:
             os.chdir(oldcwd)
     graph = builder.graph
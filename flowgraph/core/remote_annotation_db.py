@@ -14,7 +14,7 @@
 
 from __future__ import absolute_import
 
-from pathlib2 import Path
+import os
 
 import requests
 from traitlets import Bool, Dict, Instance, Unicode, default
@@ -47,8 +47,9 @@ class RemoteAnnotationDB(AnnotationDB, Configurable):
     def from_library_config(cls):
         """ Create annotation DB from library config file.
         """
-        config_path = Path(flowgraph.__file__).parent.joinpath("config.py")
-        config = PyFileConfigLoader(str(config_path)).load_config()
+        config_path = os.path.join(os.path.dirname(flowgraph.__file__),
+                                   "config.py")
+        config = PyFileConfigLoader(config_path).load_config()
         return cls(config=config)
 
     def load_package(self, package):
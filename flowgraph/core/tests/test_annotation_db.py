@@ -14,9 +14,10 @@
 
 from __future__ import absolute_import
 
-from pathlib2 import Path
+import os
 import unittest
 
+from .. import annotation_db
 from ..annotation_db import AnnotationDB
 
 
@@ -24,11 +25,28 @@ class TestAnnotationDB(unittest.TestCase):
     """ Test the in-memory annotation database on local annotations.
     """
 
+    json_path = os.path.join(os.path.dirname(__file__), 'data',
+                             'annotations.json')
+
     @classmethod
     def setUpClass(cls):
-        json_path = Path(__file__).parent.joinpath('data', 'annotations.json')
         cls.db = AnnotationDB()
-        cls.db.load_file(json_path)
+        cls.db.load_file(cls.json_path)
+    
+    def test_load_file_without_orjson(self):
+        """ Test loading a file with the standard library JSON parser.
+        """
+        orjson = annotation_db.orjson
+        annotation_db.orjson = None
+        try:
+            db = AnnotationDB()
+            db.load_file(self.json_path)
+        finally:
+            annotation_db.orjson = orjson
+        
+        notes = list(db.filter({}))
+        self.assertEqual(notes, list(self.db.filter({})))
+        self.assertEqual(len(notes), 16)
     
     def test_basic_get(self):
         """ Test a simple, single-document query.
@@ -44,6 +62,24 @@ class TestAnnotationDB(unittest.TestCase):
         with self.assertRaises(LookupError):
             self.db.get(query)
     
+    def test_get_after_load(self):
+        """ Are cached query results invalidated when documents are loaded?
+        """
+        db = AnnotationDB()
+        query = {'id': 'qux'}
+        self.assertEqual(db.get(query), None)
+        
+        db.load_documents([{
+            '_id': 'annotation/python/flowgraph/qux',
+            'schema': 'annotation',
+            'language': 'python',
+            'package': 'flowgraph',
+            'id': 'qux',
+            'kind': 'type',
+        }])
+        note = db.get(query)
+        self.assertEqual(note['id'], 'qux')
+    
     def test_basic_filter(self):
         """ Test a simple, multi-document query.
         """
@@ -65,6 +101,172 @@ class TestAnnotationDB(unittest.TestCase):
         query = {'id': {'$in': ['foo', 'bar']}}
         notes = list(self.db.filter(query))
         self.assertEqual(len(notes), 2)
+    
+    def test_in_operator_with_other_fields(self):
+        """ Test that the `$in` query operator works together with other
+        indexed fields.
+        """
+        query = {'kind': 'function', 'method': {'$in': ['do_sum', 'do_prod']}}
+        notes = list(self.db.filter(query))
+        self.assertEqual(set(note['id'] for note in notes),
+                         {'foo-sum', 'foo-prod', 'bar-prod'})
+        
+        query = {'kind': 'type', 'id': {'$in': ['foo', 'create-foo']}}
+        notes = list(self.db.filter(query))
+        self.assertEqual([note['id'] for note in notes], ['foo'])
+    
+    def test_null_values(self):
+        """ Test queries for null values of nullable, indexed fields.
+        """
+        notes = list(self.db.filter({'method': None}))
+        self.assertEqual(len(notes), 13)
+        self.assertTrue(all(note.get('method') is None for note in notes))
+        
+        query = {'kind': 'function', 'method': None}
+        notes = list(self.db.filter(query))
+        self.assertEqual([note['id'] for note in notes], [
+            'create-foo', 'new-empty', 'bar-from-foo', 'bar-from-foo-mutating'
+        ])
+        
+        query = {'kind': 'function', 'function': {'$in': [None]}}
+        notes = list(self.db.filter(query))
+        self.assertEqual([note['id'] for note in notes],
+                         ['foo-sum', 'foo-prod', 'bar-prod'])
+    
+    def test_primary_key_get(self):
+        """ Test getting a document by primary key.
+        """
+        pk = 'annotation/python/flowgraph/foo'
+        note = self.db.get({'pk': pk})
+        self.assertEqual(note['pk'], pk)
+        self.assertEqual(note['id'], 'foo')
+        
+        self.assertEqual(self.db.get({'pk': 'XXX'}), None)
+        self.assertEqual(self.db.get({'pk': pk, 'kind': 'function'}), None)
+    
+    def test_load_order(self):
+        """ Are documents returned in the order in which they were loaded?
+        """
+        query = {'package': 'flowgraph', 'method': {'$in': ['do_prod']}}
+        notes = list(self.db.filter(query))
+        self.assertEqual([note['id'] for note in notes],
+                         ['foo-prod', 'bar-prod'])
+    
+    def test_reload_document(self):
+        """ Does reloading a document replace it in the index?
+        """
+        db = AnnotationDB()
+        note = {
+            '_id': 'annotation/python/flowgraph/qux',
+            'schema': 'annotation',
+            'language': 'python',
+            'package': 'flowgraph',
+            'id': 'qux',
+            'kind': 'type',
+        }
+        db.load_documents([note])
+        db.load_documents([dict(note, kind='function', method='do_qux')])
+        
+        self.assertEqual(list(db.filter({'kind': 'type'})), [])
+        self.assertNotIn('type', db._index['kind'])
+        self.assertNotIn(None, db._index['method'])
+        notes = list(db.filter({'kind': 'function'}))
+        self.assertEqual(len(notes), 1)
+        self.assertEqual(notes[0]['kind'], 'function')
+        self.assertEqual(len(list(db.filter({'id': 'qux'}))), 1)
+    
+    def test_non_indexed_filter(self):
+        """ Test queries on fields that are not indexed.
+        """
+        notes = list(self.db.filter({'definition': 'foo'}))
+        self.assertEqual([note['id'] for note in notes], ['foo', 'foo-slots'])
+        
+        query = {'kind': 'type', 'definition': 'bar'}
+        notes = list(self.db.filter(query))
+        self.assertEqual([note['id'] for note in notes],
+                         ['bar', 'bar-with-mixin'])
+        
+        # Missing key.
+        self.assertEqual(list(self.db.filter({'XXX': 'foo'})), [])
+        
+        # Non-dictionary values along the path.
+        query = {'definition': {'id': 'foo'}}
+        self.assertEqual(list(self.db.filter(query)), [])
+        self.assertEqual(list(self.db.filter({'slots': {}})), [])
+    
+    def test_nested_filter(self):
+        """ Test queries on nested fields that are not indexed.
+        """
+        db = AnnotationDB()
+        note = {
+            'schema': 'annotation',
+            'language': 'python',
+            'package': 'flowgraph',
+            'kind': 'type',
+        }
+        db.load_documents([
+            dict(note, _id='qux', id='qux',
+                 meta={'source': {'file': 'qux.py'}}),
+            dict(note, _id='quux', id='quux', meta={'source': 'builtin'}),
+            dict(note, _id='quuz', id='quuz'),
+        ])
+        def ids(query):
+            return [ note['id'] for note in db.filter(query) ]
+        
+        query = {'meta': {'source': {'file': 'qux.py'}}}
+        self.assertEqual(ids(query), ['qux'])
+        self.assertEqual(ids({'meta': {'source': {'file': 'XXX'}}}), [])
+        self.assertEqual(ids({'meta': {'source': 'builtin'}}), ['quux'])
+        self.assertEqual(ids({'meta': {'source': {'file': 'qux.py'}},
+                              'kind': 'type'}), ['qux'])
+        
+        # An empty object matches any object, but not other values.
+        self.assertEqual(ids({'meta': {}}), ['qux', 'quux'])
+        self.assertEqual(ids({'meta': {'source': {}}}), ['qux'])
+    
+    def test_match_paths(self):
+        """ Do the Python and compiled query matchers agree?
+        """
+        matchers = [ annotation_db._match_paths_py ]
+        try:
+            from .._query import match_paths
+        except ImportError:
+            pass
+        else:
+            matchers.append(match_paths)
+        
+        cases = [
+            ({}, {'x': 1}, True),
+            ({'x': 1}, {'x': 1}, True),
+            ({'x': 1}, {'x': 2}, False),
+            ({'x': 1, 'y': 2}, {'x': 1, 'y': 3}, False),
+            ({'x': None}, {'x': None}, True),
+            ({'x': None}, {}, False),
+            ({'x': [1, 2]}, {'x': [1, 2]}, True),
+            ({'x': {'y': 1}}, {'x': {'y': 1, 'z': 2}}, True),
+            ({'x': {'y': {'z': 'a'}}}, {'x': {'y': {'z': 'a'}}}, True),
+            ({'x': {'y': {'z': 'a'}}}, {'x': {'y': {}}}, False),
+            ({'x': {'y': 1}}, {'x': 1}, False),
+            ({'x': {'y': 1}}, {'x': [1]}, False),
+            ({'x': {}}, {'x': {'y': 1}}, True),
+            ({'x': {}}, {'x': []}, False),
+        ]
+        for match_paths in matchers:
+            for query, obj, expected in cases:
+                match = annotation_db._compile_query(query)
+                self.assertEqual(match_paths(match, obj), expected,
+                                 msg='%r: %r against %r' % (
+                                     match_paths, query, obj))
+    
+    def test_unsupported_operators(self):
+        """ Are unsupported query operators rejected?
+        """
+        with self.assertRaises(NotImplementedError):
+            list(self.db.filter({'kind': {'$ne': 'type'}}))
+        with self.assertRaises(NotImplementedError):
+            list(self.db.filter({'$and': [{'id': 'foo'}]}))
+        with self.assertRaises(NotImplementedError):
+            list(self.db.filter({'slots': {'$size': 3}}))
 
 
 if __name__ == '__main__':
@@ -14,7 +14,7 @@
 
 from __future__ import absolute_import
 
-from pathlib2 import Path
+import os
 import unittest
 
 from . import objects
@@ -24,8 +24,8 @@ from ..annotator import Annotator
 class TestAnnotator(unittest.TestCase):
     
     def setUp(self):
-        objects_path = Path(objects.__file__).parent
-        json_path = objects_path.joinpath('data', 'annotations.json')
+        objects_path = os.path.dirname(objects.__file__)
+        json_path = os.path.join(objects_path, 'data', 'annotations.json')
         self.annotator = Annotator()
         self.annotator.db.load_file(json_path)
     
@@ -15,7 +15,7 @@
 from __future__ import absolute_import
 
 from collections import OrderedDict
-from pathlib2 import Path
+import os
 import six
 from textwrap import dedent
 import unittest
@@ -41,10 +41,10 @@ class TestFlowGraph(unittest.TestCase):
     def setUpClass(cls):
         """ Set up the annotation DB and object tracker.
         """
-        objects_path = Path(objects.__file__).parent
-        json_path = objects_path.joinpath('data', 'annotations.json')
+        objects_path = os.path.dirname(objects.__file__)
+        json_path = os.path.join(objects_path, 'data', 'annotations.json')
         cls.db = AnnotationDB()
-        cls.db.load_file(str(json_path))
+        cls.db.load_file(json_path)
         cls.object_tracker = ObjectTracker()
 
     def record(self, code, env=None, **kwargs):
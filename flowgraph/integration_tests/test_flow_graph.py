@@ -14,8 +14,8 @@
 
 from __future__ import absolute_import
 
+from collections import Counter
 import os
-from pathlib2 import Path
 import six
 import unittest
 
@@ -29,7 +29,7 @@ from ..core.record import record_script
 from ..core.remote_annotation_db import RemoteAnnotationDB
 from ..trace.tracer import Tracer
 
-data_path = Path(__file__).parent.joinpath('data')
+data_path = os.path.join(os.path.dirname(__file__), 'data')
 
 
 class IntegrationTestFlowGraph(unittest.TestCase):
@@ -51,6 +51,25 @@ class IntegrationTestFlowGraph(unittest.TestCase):
         node_defaults = [ None ] * len(node_attrs)
         edge_attrs = [ 'annotation', 'sourceport', 'targetport' ]
         edge_defaults = [ None ] * len(edge_attrs)
+        
+        # When the node attributes are unique, the only possible isomorphism
+        # is determined by the node attributes, so we can check it directly.
+        actual_nodes = self.label_nodes(actual, node_attrs)
+        target_nodes = self.label_nodes(target, node_attrs)
+        if actual_nodes is not None and target_nodes is not None:
+            self.assertEqual(set(actual_nodes), set(target_nodes))
+            mapping = { target_nodes[label]: actual_nodes[label]
+                        for label in target_nodes }
+            def edge_labels(graph, mapping=lambda node: node):
+                return Counter(
+                    (mapping(src), mapping(tgt),
+                     tuple(data.get(attr) for attr in edge_attrs))
+                    for src, tgt, data in graph.edges(data=True))
+            self.assertEqual(edge_labels(actual),
+                             edge_labels(target, mapping.__getitem__))
+            return mapping
+        
+        # Otherwise, fall back to the VF2 algorithm.
         node_match = iso.categorical_node_match(node_attrs, node_defaults)
         edge_match = iso.categorical_multiedge_match(edge_attrs, edge_defaults)
         matcher = iso.DiGraphMatcher(
@@ -58,6 +77,23 @@ class IntegrationTestFlowGraph(unittest.TestCase):
         self.assertTrue(matcher.is_isomorphic())
         return matcher.mapping
     
+    def label_nodes(self, graph, node_attrs):
+        """ Label the nodes of a flow graph by their attributes.
+        
+        Returns a dictionary mapping labels to nodes, or None if the labels
+        are not unique.
+        """
+        roles = { graph.graph['input_node']: 'input',
+                  graph.graph['output_node']: 'output' }
+        labels = {}
+        for node, data in graph.nodes(data=True):
+            label = (roles.get(node),) + \
+                tuple(data.get(attr) for attr in node_attrs)
+            if label in labels:
+                return None
+            labels[label] = node
+        return labels
+    
     def assert_valid_ports(self, graph):
         """ Assert that edges in flow graph have valid source and target ports.
 
@@ -81,13 +117,13 @@ class IntegrationTestFlowGraph(unittest.TestCase):
         """ Execute and record a test script.
         """
         # Record the script.
-        filename = str(data_path.joinpath(name + '.py'))
-        graph = record_script(filename, env=env, cwd=str(data_path), db=self.db,
+        filename = os.path.join(data_path, name + '.py')
+        graph = record_script(filename, env=env, cwd=data_path, db=self.db,
                               store_slots=False)
         
         # Save the graph as GraphML for consumption by downstream tests.
         if save:
-            outname = str(data_path.joinpath(name + '.xml'))
+            outname = os.path.join(data_path, name + '.xml')
             graphml = flow_graph_to_graphml(graph, outputs='simplify')
             write_graphml(graphml, outname)
         
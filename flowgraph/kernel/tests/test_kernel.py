@@ -14,7 +14,7 @@
 
 from __future__ import absolute_import, print_function
 
-from pathlib2 import Path
+import os
 from textwrap import dedent
 import unittest
 
@@ -62,8 +62,8 @@ class TestFlowGraphKernel(unittest.TestCase):
 
         tu.KM, tu.KC = tu.start_new_kernel(kernel_name=get_kernel_name())
         
-        objects_path = Path(test_objects.__file__).parent
-        json_path = objects_path.joinpath('data', 'annotations.json')
+        objects_path = os.path.dirname(test_objects.__file__)
+        json_path = os.path.join(objects_path, 'data', 'annotations.json')
         code = dedent("""\
         shell = get_ipython()
         shell.kernel.annotator.db.load_file('%s')
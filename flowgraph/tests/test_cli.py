@@ -14,7 +14,7 @@
 
 from __future__ import absolute_import
 
-from pathlib2 import Path
+import os
 import unittest
 
 from click.testing import CliRunner
@@ -23,7 +23,7 @@ from ..core.flow_graph import flow_graph_from_graphml
 from ..core.graphml import read_graphml_str
 from ..cli import cli
 
-data_path = Path(__file__).parent.joinpath('data')
+data_path = os.path.join(os.path.dirname(__file__), 'data')
 
 
 class TestCLI(unittest.TestCase):
@@ -33,7 +33,7 @@ class TestCLI(unittest.TestCase):
     def test_record_file(self):
         """ Test that a file can be recorded using the CLI.
         """
-        filename = str(data_path.joinpath('sklearn_make_blobs.py'))
+        filename = os.path.join(data_path, 'sklearn_make_blobs.py')
         runner = CliRunner(mix_stderr=False)
         result = runner.invoke(cli, [filename])
         xml = result.output
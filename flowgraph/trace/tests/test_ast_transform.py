@@ -18,65 +18,117 @@ import ast
 from textwrap import dedent
 import unittest
 
-from astor import to_source
+from cachetools import cached
 
 from ..ast_transform import *
 from ..ast_util import gensym
 
 
+def dump_ast(node):
+    """ Dump an AST for comparison, like `ast.dump`, treating missing fields
+    as None.
+    
+    Nodes created by the transformers lack some optional fields, such as
+    `type_comment` and `kind` in Python 3.8, that `ast.parse` sets to None.
+    """
+    if isinstance(node, ast.AST):
+        return '%s(%s)' % (node.__class__.__name__, ', '.join(
+            '%s=%s' % (name, dump_ast(getattr(node, name, None)))
+            for name in node._fields))
+    elif isinstance(node, list):
+        return '[%s]' % ', '.join(dump_ast(item) for item in node)
+    return repr(node)
+
+
+@cached(cache={})
+def dump_source(source):
+    """ Parse and dump Python source code, for comparison with an AST.
+    """
+    return dump_ast(ast.parse(source))
+
+
 class TestASTTransform(unittest.TestCase):
     """ Test cases for abstract syntax tree (AST) transformers.
     """
 
+    @classmethod
+    def setUpClass(cls):
+        """ Set up the cache of AST transformers.
+        """
+        # The transformers are stateless, so they can be shared across tests.
+        cls._transformers = {}
+    
+    def transformer(self, transformer_class, *args):
+        """ Get the shared AST transformer of the given class and arguments.
+        """
+        key = (transformer_class,) + args
+        transformer = self._transformers.get(key)
+        if transformer is None:
+            transformer = self._transformers[key] = transformer_class(*args)
+        return transformer
+
+    def assert_transform(self, transformer_class, source, expected, *args):
+        """ Assert that the transformer rewrites the source code into the
+        expected source code.
+        
+        The ASTs are compared directly, which is much cheaper than generating
+        source code from the transformed AST and less sensitive to formatting.
+        """
+        transformer = self.transformer(transformer_class, *args)
+        node = transformer.visit(ast.parse(source))
+        self.assert_ast_equal(node, expected)
+    
+    def assert_ast_equal(self, node, source):
+        """ Assert that an AST is equal to the AST of the (dedented) source.
+        """
+        self.assertEqual(dump_ast(node), dump_source(dedent(source)))
+
     def test_single_assign(self):
         """ Are single assignments are preserved exactly?
         """
-        node = ast.parse('x = f()')
-        EliminateMultipleTargets().visit(node)
-        self.assertEqual(to_source(node).strip(), 'x = f()')
+        self.assert_transform(EliminateMultipleTargets, 'x = f()', 'x = f()')
 
-        node = ast.parse('x, y = f()')
-        EliminateMultipleTargets().visit(node)
-        self.assertEqual(to_source(node).strip(), 'x, y = f()')
+        self.assert_transform(EliminateMultipleTargets, 'x, y = f()',
+                              'x, y = f()')
     
     def test_compound_assign_with_tuple(self):
         """ Can we simplify compound assignments with tuple literal values?
         """
         node = ast.parse('x, y = f(), g()')
         gensym.reset()
-        EliminateMultipleTargets().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(EliminateMultipleTargets).visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1 = f()
             __gensym_2 = g()
             x = __gensym_1
             y = __gensym_2
-        """))
+        """)
 
     def test_multiple_assign_simple(self):
         """ Can we eliminate a simple multiple assignment?
         """
         node = ast.parse('x = y = f()')
         gensym.reset()
-        EliminateMultipleTargets().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(EliminateMultipleTargets).visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1 = f()
             x = __gensym_1
             y = __gensym_1
-        """))
+        """)
     
     def test_multiple_assign_compound(self):
         """ Can we eliminate a compound multiple assignment?
         """
         node = ast.parse('a, b = x, y = f()')
         gensym.reset()
-        EliminateMultipleTargets().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(EliminateMultipleTargets).visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1, __gensym_2 = f()
             x = __gensym_1
             y = __gensym_2
             a = __gensym_1
             b = __gensym_2
-        """))
+        """)
     
     def test_multiple_assign_simple_and_compound(self):
         """ Can we eliminate a multiple assignment involing both simple and
@@ -84,13 +136,13 @@ class TestASTTransform(unittest.TestCase):
         """
         node = ast.parse('z = x, y = f()')
         gensym.reset()
-        EliminateMultipleTargets().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(EliminateMultipleTargets).visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1, __gensym_2 = f()
             x = __gensym_1
             y = __gensym_2
             z = __gensym_1, __gensym_2
-        """))
+        """)
     
     def test_simple_getattr(self):
         """ Can we replace a simple attribute access with `getattr`?
@@ -99,20 +151,20 @@ class TestASTTransform(unittest.TestCase):
             x = obj.x
             y = obj.y
         """))
-        AttributesToFunctions().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(AttributesToFunctions).visit(node)
+        self.assert_ast_equal(node, """\
             x = getattr(obj, 'x')
             y = getattr(obj, 'y')
-        """))
+        """)
     
     def test_compound_getattr(self):
         """ Can we replace a compound attribute access with `getattr`s?
         """
         node = ast.parse('x = container.obj.x')
-        AttributesToFunctions().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(AttributesToFunctions).visit(node)
+        self.assert_ast_equal(node, """\
             x = getattr(getattr(container, 'obj'), 'x')
-        """))
+        """)
     
     def test_simple_setattr(self):
         """ Can we replace a simple attribute assignment with `setattr`?
@@ -121,220 +173,189 @@ class TestASTTransform(unittest.TestCase):
             foo.x = 10
             foo.y = 100
         """))
-        AttributesToFunctions().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(AttributesToFunctions).visit(node)
+        self.assert_ast_equal(node, """\
             setattr(foo, 'x', 10)
             setattr(foo, 'y', 100)
-        """))
+        """)
     
     def test_compound_setattr(self):
         """ Can we replace a compound attribute asssignment with `getattr` and
         `setattr`?
         """
         node = ast.parse('container.foo.x = 10')
-        AttributesToFunctions().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(AttributesToFunctions).visit(node)
+        self.assert_ast_equal(node, """\
             setattr(getattr(container, 'foo'), 'x', 10)
-        """))
+        """)
     
     def test_delattr(self):
         """ Can we replace an attribute deletion with `delattr`?
         """
         node = ast.parse('del foo.x')
-        AttributesToFunctions().visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(AttributesToFunctions).visit(node)
+        self.assert_ast_equal(node, """\
             delattr(foo, 'x')
-        """))
+        """)
     
     def test_unary_op(self):
         """ Can we replace unary operators with function calls?
         """
-        node = ast.parse('-x')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.neg(x)')
+        self.assert_transform(OperatorsToFunctions, '-x', 'operator.neg(x)')
 
-        node = ast.parse('~x')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.invert(x)')
+        self.assert_transform(OperatorsToFunctions, '~x',
+                              'operator.invert(x)')
     
     def test_unary_negate_literal(self):
         """ Check that negations of literals aren't transformed.
         """
-        node = ast.parse('-1')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), '-1')
+        self.assert_transform(OperatorsToFunctions, '-1', '-1')
     
     def test_binary_op(self):
         """ Can we replace binary operators with function calls?
         """
-        node = ast.parse('x+y')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.add(x, y)')
+        self.assert_transform(OperatorsToFunctions, 'x+y',
+                              'operator.add(x, y)')
 
-        node = ast.parse('x*y')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.mul(x, y)')
+        self.assert_transform(OperatorsToFunctions, 'x*y',
+                              'operator.mul(x, y)')
     
     def test_inplace_binary_op(self):
         """ Can we replace an inplace binary operation with an assignment?
         """
-        node = ast.parse('x += 1')
-        InplaceOperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'x = operator.iadd(x, 1)')
+        self.assert_transform(InplaceOperatorsToFunctions, 'x += 1',
+                              'x = operator.iadd(x, 1)')
 
-        node = ast.parse('x *= y')
-        InplaceOperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'x = operator.imul(x, y)')
+        self.assert_transform(InplaceOperatorsToFunctions, 'x *= y',
+                              'x = operator.imul(x, y)')
     
     def test_comparison_op(self):
         """ Can we replace comparison operators with function calls?
         """
-        node = ast.parse('x < y')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.lt(x, y)')
+        self.assert_transform(OperatorsToFunctions, 'x < y',
+                              'operator.lt(x, y)')
 
-        node = ast.parse('x <= y')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.le(x, y)')
+        self.assert_transform(OperatorsToFunctions, 'x <= y',
+                              'operator.le(x, y)')
     
     def test_contains_op(self):
         """ Can we replace containment operators with function calls?
         """
-        node = ast.parse('b in a')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.contains(a, b)')
+        self.assert_transform(OperatorsToFunctions, 'b in a',
+                              'operator.contains(a, b)')
 
-        node = ast.parse('b not in a')
-        OperatorsToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(),
-                         'operator.not_(operator.contains(a, b))')
+        self.assert_transform(OperatorsToFunctions, 'b not in a',
+                              'operator.not_(operator.contains(a, b))')
         
     def test_simple_getitem(self):
         """ Can we replace a simple indexing operation with `getitem`?
         """
-        node = ast.parse('x[0]')
-        IndexingToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.getitem(x, 0)')
+        self.assert_transform(IndexingToFunctions, 'x[0]',
+                              'operator.getitem(x, 0)')
     
     def test_slice_getitem(self):
         """ Can we replace a slice indexing operation with `getitem`?
         """
-        node = ast.parse('x[0:1]')
-        IndexingToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(),
-                         'operator.getitem(x, slice(0, 1))')
+        self.assert_transform(IndexingToFunctions, 'x[0:1]',
+                              'operator.getitem(x, slice(0, 1))')
         
-        node = ast.parse('x[::2]')
-        IndexingToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(),
-                         'operator.getitem(x, slice(None, None, 2))')
+        self.assert_transform(IndexingToFunctions, 'x[::2]',
+                              'operator.getitem(x, slice(None, None, 2))')
     
     def test_multidim_slice_getitem(self):
         """ Can we replace a multidimensional slice with `getitem`?
         """
-        node = ast.parse('x[:m, :n]')
-        IndexingToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(),
-                         'operator.getitem(x, (slice(m), slice(n)))')
+        self.assert_transform(IndexingToFunctions, 'x[:m, :n]',
+                              'operator.getitem(x, (slice(m), slice(n)))')
     
     def test_simple_setitem(self):
         """ Can we replace an indexed assignment with `setitem`?
         """
-        node = ast.parse('x[0] = 1')
-        IndexingToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.setitem(x, 0, 1)')
+        self.assert_transform(IndexingToFunctions, 'x[0] = 1',
+                              'operator.setitem(x, 0, 1)')
     
     def test_simple_delitem(self):
         """ Can we replace an indexed deletion with `delitem`?
         """
-        node = ast.parse('del x[0]')
-        IndexingToFunctions().visit(node)
-        self.assertEqual(to_source(node).strip(), 'operator.delitem(x, 0)')
+        self.assert_transform(IndexingToFunctions, 'del x[0]',
+                              'operator.delitem(x, 0)')
     
     def test_inplace_setitem(self):
         """ Can we replace an inplace indexed binary op with function calls?
         """
         node = ast.parse('x[n] += 1')
-        IndexingToFunctions('op').visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(IndexingToFunctions, 'op').visit(node)
+        self.assert_ast_equal(node, """\
             op.setitem(x, n, op.iadd(op.getitem(x, n), 1))
-        """))
+        """)
     
     def test_inplace_setitem_gensym_target(self):
         """ Is the target value gensym-ed in inplace indexed operations?
         """
         node = ast.parse('x.data[n] += 1')
         gensym.reset()
-        IndexingToFunctions('op').visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(IndexingToFunctions, 'op').visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1 = x.data
             op.setitem(__gensym_1, n, op.iadd(op.getitem(__gensym_1, n), 1))
-        """))
+        """)
     
     def test_inplace_setitem_gensym_index(self):
         """ Is the index value gensym-ed in inplace indexed operations?
         """
         node = ast.parse('x[m:m+n] += 1')
         gensym.reset()
-        IndexingToFunctions('op').visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(IndexingToFunctions, 'op').visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1 = slice(m, m + n)
             op.setitem(x, __gensym_1, op.iadd(op.getitem(x, __gensym_1), 1))
-        """))
+        """)
     
     def test_inplace_setitem_gensym_both(self):
         """ Are both target and index values gensym-ed in inplace indexed ops?
         """
         node = ast.parse('x.data[m:m+n] += 1')
         gensym.reset()
-        IndexingToFunctions('op').visit(node)
-        self.assertEqual(to_source(node), dedent("""\
+        self.transformer(IndexingToFunctions, 'op').visit(node)
+        self.assert_ast_equal(node, """\
             __gensym_1 = x.data
             __gensym_2 = slice(m, m + n)
             op.setitem(__gensym_1, __gensym_2, op.iadd(op.getitem(__gensym_1,
                 __gensym_2), 1))
-        """))
+        """)
     
     def test_list_literal(self):
         """ Can we replace a list literal with a function call?
         """
-        node = ast.parse('[1,2,3]')
-        ContainerLiteralsToFunctions().visit(node)
-        result = 'operator.__list__(1, 2, 3)'
-        self.assertEqual(to_source(node).strip(), result)
+        self.assert_transform(ContainerLiteralsToFunctions, '[1,2,3]',
+                              'operator.__list__(1, 2, 3)')
     
     def test_tuple_literal(self):
         """ Can we replace a tuple literal with a function call?
         """
-        node = ast.parse('(1,2,3)')
-        ContainerLiteralsToFunctions().visit(node)
-        result = 'operator.__tuple__(1, 2, 3)'
-        self.assertEqual(to_source(node).strip(), result)
+        self.assert_transform(ContainerLiteralsToFunctions, '(1,2,3)',
+                              'operator.__tuple__(1, 2, 3)')
     
     def test_set_literal(self):
         """ Can we replace a set literal with a function call?
         """
-        node = ast.parse('{1,2,3}')
-        ContainerLiteralsToFunctions().visit(node)
-        result = 'operator.__set__(1, 2, 3)'
-        self.assertEqual(to_source(node).strip(), result)
+        self.assert_transform(ContainerLiteralsToFunctions, '{1,2,3}',
+                              'operator.__set__(1, 2, 3)')
     
     def test_dict_literal(self):
         """ Can we replace a dictionary literal whose keys are strings with a
         function call?
         """
-        node = ast.parse("{'x': 1, 'y': 2}")
-        ContainerLiteralsToFunctions().visit(node)
-        result = 'dict(x=1, y=2)'
-        self.assertEqual(to_source(node).strip(), result)
+        self.assert_transform(ContainerLiteralsToFunctions,
+                              "{'x': 1, 'y': 2}",
+                              'dict(x=1, y=2)')
     
     def test_compound_sequence_literal(self):
         """ Can we replace a compound sequence literal with function calls?
         """
-        node = ast.parse("[ ('x',0), ('y',1) ]")
-        ContainerLiteralsToFunctions('op').visit(node)
-        result = "op.__list__(op.__tuple__('x', 0), op.__tuple__('y', 1))"
-        self.assertEqual(to_source(node).strip(), result)
+        self.assert_transform(
+            ContainerLiteralsToFunctions, "[ ('x',0), ('y',1) ]",
+            "op.__list__(op.__tuple__('x', 0), op.__tuple__('y', 1))", 'op')
 
 
 if __name__ == '__main__':
@@ -280,6 +280,39 @@ class TestTracer(unittest.TestCase):
         event = events[0]
         self.assertIsInstance(event, TraceDelete)
         self.assertEqual(event.name, 'x')
+    
+    def test_event_handler(self):
+        """ Are event handlers called with the same events as observers?
+        """
+        events, observed = [], []
+        def observer(changed):
+            # Ignore the reset of the event trait at the start of tracing.
+            event = changed['new']
+            if event:
+                observed.append(event)
+        self.tracer.add_event_handler(events.append)
+        self.tracer.observe(observer, 'event')
+        self.trace("""
+            foo = objects.Foo()
+            bar = objects.bar_from_foo(foo)
+        """)
+        self.assertTrue(events)
+        self.assertEqual(events, observed)
+        
+        self.tracer.remove_event_handler(events.append)
+        del events[:]
+        self.trace("x = 1")
+        self.assertEqual(events, [])
+    
+    def test_event_handler_unobserved(self):
+        """ Are event handlers called when the event trait is not observed?
+        """
+        tracer = Tracer()
+        events = []
+        tracer.add_event_handler(events.append)
+        tracer.trace("x = objects.create_foo()", env=dict(objects=objects))
+        self.assertTrue(events)
+        self.assertIs(tracer.event, events[-1])
 
 
 if __name__ == '__main__':
@@ -49,6 +49,9 @@ class Tracer(ASTTracer):
     # The trace call event stack. Read-only.
     stack = List(Instance(TraceCall))
 
+    # Functions called with each trace event (see `add_event_handler`).
+    _event_handlers = List()
+
     # Scope stack for currently executing code.
     _stack = Instance(deque, ()) # List(Instance(_ScopeItem))
     
@@ -99,6 +102,19 @@ class Tracer(ASTTracer):
         exec(compiled, env)
         return env
     
+    def add_event_handler(self, handler):
+        """ Add a function to be called with each trace event.
+
+        This is equivalent to observing the `event` trait, but it avoids the
+        overhead of a trait change notification per handler and event.
+        """
+        self._event_handlers.append(handler)
+    
+    def remove_event_handler(self, handler):
+        """ Remove a function added by `add_event_handler`.
+        """
+        self._event_handlers.remove(handler)
+    
     # AST Tracer interface
 
     def _trace_function(self, function, nargs):
@@ -153,7 +169,7 @@ class Tracer(ASTTracer):
         emit_events = prev_scope.emit_events and \
             not (prev_scope.event and prev_scope.event.atomic)
         if emit_events:
-            self.event = event
+            self._emit_event(event)
 
         scope = _ScopeItem(event=event, emit_events=emit_events)
         self._stack.append(scope)
@@ -181,7 +197,7 @@ class Tracer(ASTTracer):
         event = self._create_return_event(
             scope.event, return_value, multiple_values)
         if scope.emit_events:
-            self.event = event
+            self._emit_event(event)
 
         return event
     
@@ -192,7 +208,8 @@ class Tracer(ASTTracer):
 
         # Create access event.
         if scope.emit_events:
-            self.event = event = TraceAccess(name=name, value=value)
+            event = TraceAccess(name=name, value=value)
+            self._emit_event(event)
             return event
         
         return value
@@ -210,8 +227,8 @@ class Tracer(ASTTracer):
 
         # Create assign event.
         if scope.emit_events:
-            self.event = event = TraceAssign(
-                name=name, value=value, value_event=value_event)
+            event = TraceAssign(name=name, value=value, value_event=value_event)
+            self._emit_event(event)
             return event
         
         return value
@@ -221,10 +238,17 @@ class Tracer(ASTTracer):
         """
         scope = self._stack[-1]
         if scope.emit_events:
-            self.event = TraceDelete(name=name)
+            self._emit_event(TraceDelete(name=name))
     
     # Protected interface
 
+    def _emit_event(self, event):
+        """ Emit a trace event to observers and event handlers.
+        """
+        self.event = event
+        for handler in self._event_handlers:
+            handler(event)
+
     def _prepare_env(self):
         """ Prepare the environment in which code will be excecuted.
         """
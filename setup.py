@@ -1,4 +1,8 @@
 from setuptools import setup, find_packages
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
 
 setup_args = {
     'name': 'flowgraph',
@@ -11,9 +15,7 @@ setup_args = {
     'packages': find_packages(),
     'zip_safe': False,
     'install_requires': [
-        'pathlib2',
         'six',
-        'astor',
         'funcsigs',
         'traitlets',
         'requests',
@@ -21,19 +23,31 @@ setup_args = {
         'click',
         'networkx>=2.0',
         'cachetools==2.1.0',
-        'blitzdb @ git+https://github.com/adewes/blitzdb.git',
-        'sqlalchemy',
         'ipykernel>=4.3.0',
     ],
     'extras_require': {
+        'speedups': [
+            'orjson; python_version>="3.6"',
+        ],
         'integration_tests': [
             'numpy>=1.16',
             'scipy',
             'pandas',
             'sklearn',
+            'sqlalchemy',
             'statsmodels',
         ]
     },
 }
 
+# Build optional compiled extensions if Cython is available. The extensions
+# are optional, so installation proceeds without them if they fail to build,
+# say for lack of a C compiler.
+if cythonize is not None:
+    ext_modules = cythonize('flowgraph/core/_query.pyx')
+    for ext in ext_modules:
+        # Set after cythonizing, since Cython drops the `optional` flag.
+        ext.optional = True
+    setup_args['ext_modules'] = ext_modules
+
 setup(**setup_args)